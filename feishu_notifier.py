@@ -7,6 +7,7 @@
 
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import logging
 from typing import Dict, List, Optional
 from datetime import datetime
@@ -30,6 +31,13 @@ class FeishuNotifier:
         self.headers = {
             'Content-Type': 'application/json'
         }
+        # 复用同一会话的连接池，连续发送多条消息时无需每次重新建立 TLS 连接
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    
+    def close(self):
+        """关闭HTTP会话，释放连接池"""
+        self.session.close()
     
     def _send_request(self, payload: Dict) -> bool:
         """
@@ -42,7 +50,7 @@ class FeishuNotifier:
             bool: 发送是否成功
         """
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.webhook_url,
                 headers=self.headers,
                 data=json.dumps(payload, ensure_ascii=False).encode('utf-8'),
@@ -8,16 +8,34 @@ Date: 2025-08-04
 
 import sys
 import os
+import datetime
+import numpy as np
 import pandas as pd
 import akshare as ak
 import logging
 import json
 import time
-from typing import Dict, List, Tuple, Optional, Union
-from functools import wraps
-
-# 添加项目路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import random
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, NamedTuple, Tuple, Optional, Union
+from functools import lru_cache, wraps
+
+from market_time import CST, last_nav_update
+
+# 可选依赖：orjson 解析 JSON 更快，未安装时回退标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 字符串列显式使用 Arrow 存储（pandas 3 之前默认的 string 类型仍是 Python 对象）；缺少 pyarrow 时回退
+try:
+    import pyarrow  # noqa: F401
+    STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    STRING_DTYPE = 'string'
 
 # ==================== 常量定义 ====================
 class DataColumns:
@@ -34,17 +52,50 @@ class DataColumns:
     CLOSE = 'close'
     DATE_FIELD = 'date'
 
+class RequiredColumns:
+    """各数据源必需列常量（frozenset，校验时直接做集合差）"""
+    CN_INDEX_DAILY = frozenset({DataColumns.DATE_FIELD, DataColumns.CLOSE})
+    CN_INDEX_SPOT = frozenset({DataColumns.CODE, DataColumns.LATEST_PRICE, DataColumns.CHANGE_PCT})
+    FUND_HISTORY = frozenset({DataColumns.DATE, DataColumns.NET_VALUE})
+
+class ResolvedCode(NamedTuple):
+    """代码解析结果（不可变，可安全缓存共享）"""
+    type: str
+    market: Optional[str]
+    symbol: str
+    alias_name: Optional[str]
+
+class CacheConfig:
+    """本地磁盘缓存配置常量"""
+    DIR = os.path.join(os.path.expanduser('~'), '.cache', 'tickeye')
+    FUND_NAME_FILE = 'fund_names.parquet'
+    FUND_NAME_TTL = 24 * 3600  # 基金名称变化很少，缓存 24 小时
+    GLOBAL_SPOT_TTL = 60  # 全球指数快照在一次监测运行内共享
+    GLOBAL_SPOT_FILE = 'global_spot.parquet'  # 全球指数快照，TTL 内跨进程复用
+    FUND_DATA_SUBDIR = 'data'  # 基金历史净值缓存子目录
+    STALE_NAV_TTL = 30 * 60  # 缓存中最新净值早于预期交易日（净值尚未公布或 QDII 等 T+1 公布）时的短 TTL
+
+class ConcurrencyConfig:
+    """并发配置常量"""
+    MAX_WORKERS = 16
+
 class RetryConfig:
     """重试配置常量"""
     MAX_RETRIES = 3
     RETRY_DELAY = 1.0
     BACKOFF_FACTOR = 2.0
+    MAX_DELAY = 30.0
+    JITTER = 0.5
+    # 仅网络类异常可重试；ValueError/KeyError 等确定性错误立即抛出
+    RETRYABLE_EXCEPTIONS = (ConnectionError, TimeoutError, requests.exceptions.RequestException)
 
 # ==================== 工具函数 ====================
 def retry_api_call(max_retries: int = RetryConfig.MAX_RETRIES, 
                    delay: float = RetryConfig.RETRY_DELAY,
-                   backoff_factor: float = RetryConfig.BACKOFF_FACTOR):
-    """API调用重试装饰器"""
+                   backoff_factor: float = RetryConfig.BACKOFF_FACTOR,
+                   max_delay: float = RetryConfig.MAX_DELAY,
+                   jitter: float = RetryConfig.JITTER):
+    """API调用重试装饰器（指数退避 + 随机抖动 + 最大等待上限，仅重试网络类异常）"""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
@@ -52,10 +103,11 @@ def retry_api_call(max_retries: int = RetryConfig.MAX_RETRIES,
             for attempt in range(max_retries):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except RetryConfig.RETRYABLE_EXCEPTIONS as e:
                     last_exception = e
                     if attempt < max_retries - 1:
-                        wait_time = delay * (backoff_factor ** attempt)
+                        wait_time = min(max_delay, delay * (backoff_factor ** attempt))
+                        wait_time *= 1 + random.uniform(-jitter, jitter)
                         logging.warning(f"API调用失败，{wait_time:.1f}秒后重试 (尝试 {attempt + 1}/{max_retries}): {str(e)}")
                         time.sleep(wait_time)
                     else:
@@ -64,27 +116,89 @@ def retry_api_call(max_retries: int = RetryConfig.MAX_RETRIES,
         return wrapper
     return decorator
 
-def validate_dataframe(df: pd.DataFrame, required_columns: List[str]) -> bool:
-    """验证DataFrame是否包含必需的列"""
+def validate_dataframe(df: pd.DataFrame, required_columns) -> bool:
+    """验证DataFrame是否包含必需的列（一次集合差，不逐列在 df.columns 中查找）"""
     if df is None or df.empty:
         return False
-    return all(col in df.columns for col in required_columns)
+    return not frozenset(required_columns).difference(df.columns)
 
-def safe_get_column_value(df: pd.DataFrame, row_idx: int, column: str, default=None):
-    """安全获取DataFrame列值"""
-    try:
-        if column in df.columns and row_idx < len(df):
-            value = df.iloc[row_idx][column]
-            return value if pd.notna(value) else default
-        return default
-    except (IndexError, KeyError):
+def safe_get_row_value(row: Optional[pd.Series], column: str, default=None):
+    """安全获取已取出的行(Series)中的值，配合一次 iloc 复用，避免对同一行重复定位"""
+    if row is None:
         return default
+    value = row.get(column, default)
+    return value if value is not None and pd.notna(value) else default
+
+def read_disk_cache(filename: str, ttl: float) -> Optional[pd.DataFrame]:
+    """读取本地 parquet 缓存，文件不存在、已过期或读取失败时返回 None"""
+    path = os.path.join(CacheConfig.DIR, filename)
+    try:
+        if time.time() - os.path.getmtime(path) >= ttl:
+            return None
+        return pd.read_parquet(path)
+    except Exception:
+        return None
+
+def write_disk_cache(df: pd.DataFrame, filename: str) -> None:
+    """原子写入本地 parquet 缓存；目录不可写或缺少 parquet 引擎时静默跳过"""
+    path = os.path.join(CacheConfig.DIR, filename)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # 进程号+线程号，并发写同一文件互不干扰
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        logging.debug("写入本地缓存 %s 失败: %s", path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+
+def daily_disk_cache(func):
+    """
+    按 (基金代码, 天数) 将历史净值缓存到本地 parquet，跨进程复用，每晚净值公布后自动失效；
+    缓存中缺少最近交易日净值时只在短 TTL 内复用
+
+    指数为实时行情，不做缓存；空结果不写入缓存
+    """
+    @wraps(func)
+    def wrapper(fund_code: str, days: int = 1, info: Optional[ResolvedCode] = None) -> pd.DataFrame:
+        if info is None:
+            info = resolve_code(fund_code)
+        if info is None or info.type != 'fund':
+            return func(fund_code, days, info=info)
+
+        filename = os.path.join(CacheConfig.FUND_DATA_SUBDIR, f"{info.symbol or fund_code}_{days}.parquet")
+        nav_update = last_nav_update()
+        cached = read_disk_cache(filename, time.time() - nav_update)
+        if cached is not None and not cached.empty:
+            # 最近一次公布时刻对应交易日的净值已在缓存中，则可用到下次公布；否则只按短 TTL 复用
+            expected_date = pd.Timestamp(datetime.datetime.fromtimestamp(nav_update, CST).date())
+            if pd.to_datetime(cached[DataColumns.DATE]).max() >= expected_date:
+                return cached
+            try:
+                if time.time() - os.path.getmtime(os.path.join(CacheConfig.DIR, filename)) < CacheConfig.STALE_NAV_TTL:
+                    return cached
+            except OSError:
+                pass
+
+        result = func(fund_code, days, info=info)
+        if not result.empty:
+            write_disk_cache(result, filename)
+        return result
+    return wrapper
 
 # ==================== 全局变量延迟初始化 ====================
 _config_cache = {}
+# 配置文件解析结果缓存，键包含文件 mtime，文件修改后自动失效
+_file_cache: Dict[Tuple, object] = {}
 _fund_name_api_cache: Optional[Dict[str, str]] = None
-_global_index_data_cache: Optional[pd.DataFrame] = None
-_global_index_cache_loaded: bool = False
+# 东财全球指数快照：(获取时间, DataFrame, 大写代码数组)
+_global_index_snapshot: Optional[Tuple[float, pd.DataFrame, Optional[np.ndarray]]] = None
+# 共享缓存初始化锁：线程池并发时保证同一份数据只下载一次
+_fund_name_lock = threading.Lock()
+_global_index_lock = threading.Lock()
+_cn_index_spot_lock = threading.Lock()
 _US_INDEX_SYMBOL_MAP = {
     "SPX": ".INX",
     "NDX": ".NDX",
@@ -100,7 +214,32 @@ def get_owned_funds() -> Tuple[List[str], Dict[str, str]]:
             _config_cache['funds_config'] = ([], {})
     return _config_cache['funds_config']
 
+def get_owned_meta() -> Dict[str, Optional[ResolvedCode]]:
+    """
+    延迟构建已配置代码的解析结果表 {code: resolve_code(code)}
+    组合固定不变，解析一次后供下游函数通过 info 参数直接复用
+    """
+    if 'owned_meta' not in _config_cache:
+        owned_funds, _ = get_owned_funds()
+        _config_cache['owned_meta'] = {code: resolve_code(code) for code in owned_funds}
+    return _config_cache['owned_meta']
+
 # ==================== 指数配置加载与代码解析 ====================
+def _load_json_file(path: str):
+    """读取 JSON 文件，优先使用 orjson"""
+    if orjson is not None:
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def _file_mtime(path: str) -> Optional[float]:
+    """获取文件修改时间，文件不存在时返回 None"""
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
 def load_index_aliases(config_file: str = 'indices_config.json') -> dict:
     """
     加载指数别名配置
@@ -109,13 +248,17 @@ def load_index_aliases(config_file: str = 'indices_config.json') -> dict:
     try:
         if not os.path.isabs(config_file):
             config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), config_file)
-        if not os.path.exists(config_file):
-            return {"aliases": {}}
-        with open(config_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            if isinstance(data, dict) and 'aliases' in data and isinstance(data['aliases'], dict):
-                return data
+        mtime = _file_mtime(config_file)
+        if mtime is None:
             return {"aliases": {}}
+        key = ('index_aliases', config_file, mtime)
+        if key in _file_cache:
+            return _file_cache[key]
+        data = _load_json_file(config_file)
+        if not (isinstance(data, dict) and 'aliases' in data and isinstance(data['aliases'], dict)):
+            data = {"aliases": {}}
+        _file_cache[key] = data
+        return data
     except Exception:
         return {"aliases": {}}
 
@@ -125,48 +268,63 @@ def get_index_config() -> dict:
         _config_cache['index_config'] = load_index_aliases()
     return _config_cache['index_config']
 
-def resolve_code(code: str) -> dict:
+def get_index_alias_lookup() -> Dict[str, Tuple[str, dict]]:
+    """
+    延迟构建大小写合并的别名查找表 {查找键: (别名键, 别名配置)}
+    精确键优先，其次补充大写键，resolve_code 只需一次字典查找
+    """
+    if 'index_alias_lookup' not in _config_cache:
+        aliases = get_index_config().get('aliases', {})
+        lookup = {k: (k, v) for k, v in aliases.items()}
+        for k, v in aliases.items():
+            lookup.setdefault(k.upper(), (k.upper(), v))
+        _config_cache['index_alias_lookup'] = lookup
+    return _config_cache['index_alias_lookup']
+
+@lru_cache(maxsize=4096)
+def resolve_code(code: str) -> Optional[ResolvedCode]:
     """
     解析输入代码，统一判断类型与市场，并提供实际数据源symbol
-    返回：{ 'type': 'fund'|'index', 'market': 'cn'|'global'|None, 'symbol': str|None, 'alias_name': str|None }
-    若无法识别，返回空字典 {}
+    返回：ResolvedCode(type='fund'|'index', market='cn'|'global'|None, symbol=str, alias_name=str|None)
+    若无法识别，返回 None
+    纯函数且结果不可变，使用 lru_cache 缓存，同一代码只解析一次
     """
     if not code:
-        return {}
+        return None
     c = code.strip()
     if not c:
-        return {}
+        return None
 
     # 1) 命中配置别名（先精确，其次大写）
-    aliases = get_index_config().get('aliases', {})
-    if c in aliases:
-        v = aliases[c]
-        return {"type": "index", "market": v.get('market'), "symbol": v.get('symbol', c), "alias_name": v.get('name')}
+    lookup = get_index_alias_lookup()
     cu = c.upper()
-    if cu in aliases:
-        v = aliases[cu]
-        return {"type": "index", "market": v.get('market'), "symbol": v.get('symbol', cu), "alias_name": v.get('name')}
+    hit = lookup.get(c) or lookup.get(cu)
+    if hit:
+        key, v = hit
+        return ResolvedCode("index", v.get('market'), v.get('symbol', key), v.get('name'))
 
     # 2) 纯数字：视为基金
     if c.isdigit():
-        return {"type": "fund", "market": None, "symbol": c, "alias_name": None}
+        return ResolvedCode("fund", None, c, None)
 
     # 3) 中国指数直接symbol格式：sh000xxx 或 sz000xxx
     if (len(c) == 8 and (c.startswith('sh') or c.startswith('sz')) and c[2:].isdigit()):
-        return {"type": "index", "market": "cn", "symbol": c, "alias_name": None}
+        return ResolvedCode("index", "cn", c, None)
 
     # 4) 全大写英文字母/数字短码，尝试视为全球指数（例如 HSI、SPX）
     if cu == c and 2 <= len(cu) <= 10 and cu.replace('_', '').isalnum():
         # 未在别名中定义区域时，默认标记为 'global'，下游以 startswith('global') 处理
-        return {"type": "index", "market": "global", "symbol": cu, "alias_name": None}
+        return ResolvedCode("index", "global", cu, None)
 
-    return {}
+    return None
 
 # ==================== 基金配置加载函数 ====================
 def load_funds_config(config_file='funds_config.txt'):
     """
     从配置文件加载基金信息
     
+    解析结果按 (路径, JSON/TXT 文件 mtime) 缓存，配置未修改时跳过重复解析
+    
     Args:
         config_file: 配置文件路径，默认为 'funds_config.txt'
         
@@ -177,16 +335,23 @@ def load_funds_config(config_file='funds_config.txt'):
     if not os.path.isabs(config_file):
         config_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), config_file)
     
-    # 优先尝试 JSON 配置（同名 .json）
     json_file = os.path.splitext(config_file)[0] + '.json'
+    key = ('funds_config', config_file, _file_mtime(json_file), _file_mtime(config_file))
+    if key not in _file_cache:
+        _file_cache[key] = _parse_funds_config(config_file, json_file)
+    owned_funds, fund_names = _file_cache[key]
+    return list(owned_funds), dict(fund_names)
+
+def _parse_funds_config(config_file: str, json_file: str) -> Tuple[List[str], Dict[str, str]]:
+    """解析基金配置文件，优先 JSON，失败时回退 TXT"""
+    # 优先尝试 JSON 配置（同名 .json）
     owned_funds = []
     fund_names = {}
 
     # 先读取 JSON
     if os.path.exists(json_file):
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            data = _load_json_file(json_file)
             # 支持两种结构：{"items": [...]} 或 顶层数组 [...]
             items = []
             if isinstance(data, dict) and 'items' in data and isinstance(data['items'], list):
@@ -274,42 +439,53 @@ def load_funds_config(config_file='funds_config.txt'):
 def _load_fund_name_api_cache() -> Dict[str, str]:
     """
     调用 akshare 获取基金代码与名称映射并进行缓存
+    结果同时持久化到本地 parquet 文件（TTL 24 小时），命中时跳过网络请求
     """
     global _fund_name_api_cache
     if _fund_name_api_cache is not None:
         return _fund_name_api_cache
+    with _fund_name_lock:
+        # 双重检查：等待锁期间其他线程可能已完成加载
+        if _fund_name_api_cache is None:
+            _fund_name_api_cache = _fetch_fund_name_map()
+    return _fund_name_api_cache
+
+def _fetch_fund_name_map() -> Dict[str, str]:
+    """读取本地缓存或调用 akshare 获取基金代码与名称映射（调用方负责加锁）"""
+    cached_df = read_disk_cache(CacheConfig.FUND_NAME_FILE, CacheConfig.FUND_NAME_TTL)
+    if cached_df is not None and {'code', 'name'}.issubset(cached_df.columns):
+        return dict(zip(cached_df['code'].to_numpy(), cached_df['name'].to_numpy()))
 
     try:
         from akshare.fund import fund_em as ak_fund_em
     except Exception:
-        _fund_name_api_cache = {}
-        return _fund_name_api_cache
+        return {}
 
     try:
         name_df = ak_fund_em.fund_name_em()
         if name_df is None or name_df.empty:
-            _fund_name_api_cache = {}
-            return _fund_name_api_cache
+            return {}
 
         required_cols = {'基金代码', '基金简称'}
         if not required_cols.issubset(set(name_df.columns)):
             logging.warning("基金名称接口返回数据缺少必需列: %s", required_cols)
-            _fund_name_api_cache = {}
-            return _fund_name_api_cache
-
-        name_df['基金代码'] = name_df['基金代码'].astype(str).str.strip()
-        name_df['基金简称'] = name_df['基金简称'].astype(str).str.strip()
-        _fund_name_api_cache = {
-            row['基金代码']: row['基金简称']
-            for _, row in name_df.iterrows()
-            if row['基金代码'] and row['基金简称']
-        }
+            return {}
+
+        codes = name_df['基金代码'].astype(str).str.strip()
+        names = name_df['基金简称'].astype(str).str.strip()
+        # 向量化过滤空值后直接 zip 构建映射，避免 iterrows 逐行构造 Series
+        mask = codes.ne('') & names.ne('')
+        name_map = dict(zip(codes[mask].to_numpy(), names[mask].to_numpy()))
+        write_disk_cache(
+            pd.DataFrame({'code': list(name_map), 'name': list(name_map.values())}),
+            CacheConfig.FUND_NAME_FILE,
+        )
+        return name_map
     except Exception as e:
         logging.warning("通过 akshare 获取基金名称失败: %s", e)
-        _fund_name_api_cache = {}
-
-    return _fund_name_api_cache
+        return {}
 
+@lru_cache(maxsize=4096)
 def is_valid_code(code: str) -> bool:
     """
     验证基金代码或指数代码格式
@@ -322,9 +498,9 @@ def is_valid_code(code: str) -> bool:
     """
     if not code:
         return False
-    info = resolve_code(code)
-    return bool(info)
+    return resolve_code(code) is not None
 
+@lru_cache(maxsize=4096)
 def is_index_code(code: str) -> bool:
     """
     判断是否为指数代码
@@ -336,54 +512,93 @@ def is_index_code(code: str) -> bool:
         bool: 是否为指数代码
     """
     info = resolve_code(code)
-    return bool(info) and info.get('type') == 'index'
+    return info is not None and info.type == 'index'
 
 # 注意：OWNED_FUNDS 和 FUND_NAMES 已改为延迟加载，通过 get_owned_funds() 获取
 
-def get_fund_name(fund_code: str) -> str:
+def get_fund_name(fund_code: str, info: Optional[ResolvedCode] = None) -> str:
     """
     获取基金全名或指数名称
     
     优先级顺序：
-    1. 优先使用 akshare API 获取的基金名称（最准确）
-    2. 如果 API 获取失败，使用配置文件中的名称作为备选
+    1. 优先使用配置文件中的名称（无需网络请求）
+    2. 配置未提供名称时，使用 akshare API 获取的基金名称
     3. 如果都失败，返回基金代码本身
     
     Args:
         fund_code: 基金代码或指数代码
+        info: 预先解析的 resolve_code 结果，为空时重新解析
         
     Returns:
         str: 基金全名或指数名称，如果获取失败则返回代码本身
     """
-    info = resolve_code(fund_code)
-    if not info:
+    if info is None:
+        info = resolve_code(fund_code)
+    if info is None:
         return fund_code
 
-    if info.get('type') == 'index':
-        # 优先使用别名配置中的名称
-        if info.get('alias_name'):
-            return info['alias_name']
-        # cn 指数若无名称，回退代码
-        return fund_code
-    else:
-        # 基金名称优先用 API
-        api_names = _load_fund_name_api_cache()
-        api_name = api_names.get(fund_code)
-        if not api_name and fund_code.lstrip('0'):
-            api_name = api_names.get(fund_code.lstrip('0'))
-        if api_name:
-            return api_name
-    
-    # 如果 API 获取失败，尝试使用配置文件中的名称
+    # 指数优先使用别名配置中的名称
+    if info.type == 'index' and info.alias_name:
+        return info.alias_name
+
+    # 其次使用配置文件中的名称，已配置名称时完全跳过 API 请求
     _, fund_names = get_owned_funds()
-    if fund_code in fund_names:
-        config_name = fund_names[fund_code]
-        if config_name and config_name.strip():
-            return config_name.strip()
+    config_name = fund_names.get(fund_code)
+    if config_name and config_name.strip():
+        return config_name.strip()
+
+    # 指数无可用名称时回退代码，不触发基金名称接口
+    if info.type == 'index':
+        return fund_code
+
+    # 配置未提供名称时，再使用 API 获取
+    api_names = _load_fund_name_api_cache()
+    api_name = api_names.get(fund_code)
+    if not api_name and fund_code.lstrip('0'):
+        api_name = api_names.get(fund_code.lstrip('0'))
+    if api_name:
+        return api_name
     
     # 如果都失败，返回基金代码本身
     return fund_code
 
+def _get_global_spot_cached(ttl: float = CacheConfig.GLOBAL_SPOT_TTL) -> Tuple[Optional[pd.DataFrame], Optional[np.ndarray]]:
+    """
+    获取东财全球指数快照，TTL 内复用同一份数据（内存优先，其次本地 parquet 快照）
+    同时缓存代码列的大写 NumPy 数组，匹配时只需比较，无需每次对整列重新 upper
+    
+    Returns:
+        tuple: (快照 DataFrame, 大写代码数组)，快照为空时返回 (None, None)
+    """
+    global _global_index_snapshot
+    snapshot = _global_index_snapshot
+    if snapshot is not None and time.time() - snapshot[0] < ttl:
+        return snapshot[1], snapshot[2]
+
+    with _global_index_lock:
+        # 双重检查：等待锁期间其他线程可能已刷新快照
+        snapshot = _global_index_snapshot
+        if snapshot is not None and time.time() - snapshot[0] < ttl:
+            return snapshot[1], snapshot[2]
+
+        # 本地快照未过期时直接读取（连续多次运行时免去整表下载），以文件修改时间作为获取时间
+        em_df = read_disk_cache(CacheConfig.GLOBAL_SPOT_FILE, ttl)
+        if em_df is not None and not em_df.empty:
+            try:
+                fetched_at = os.path.getmtime(os.path.join(CacheConfig.DIR, CacheConfig.GLOBAL_SPOT_FILE))
+            except OSError:
+                fetched_at = time.time()
+        else:
+            em_df = ak.index_global_spot_em()
+            if em_df is None or em_df.empty:
+                return None, None
+            fetched_at = time.time()
+            write_disk_cache(em_df, CacheConfig.GLOBAL_SPOT_FILE)
+        code_col = '指数代码' if '指数代码' in em_df.columns else ('代码' if '代码' in em_df.columns else None)
+        codes_upper = em_df[code_col].astype(str).str.upper().to_numpy() if code_col else None
+        _global_index_snapshot = (fetched_at, em_df, codes_upper)
+        return em_df, codes_upper
+
 @retry_api_call()
 def get_global_index_data(fund_code: str) -> dict:
     """
@@ -398,7 +613,7 @@ def get_global_index_data(fund_code: str) -> dict:
     code_upper = str(fund_code).strip().upper() if fund_code is not None else ""
     try:
         info = resolve_code(code_upper)
-        alias_name = info.get('alias_name') if info else None
+        alias_name = info.alias_name if info else None
 
         # 1) 先使用新浪接口获取数据（针对已知支持的指数）
         if code_upper == "HSI":
@@ -449,28 +664,24 @@ def get_global_index_data(fund_code: str) -> dict:
 
         # 2) 新浪失败时，再使用东财全球指数接口兜底
         try:
-            em_df = ak.index_global_spot_em()
+            em_df, codes_upper = _get_global_spot_cached()
         except Exception as e:
             logging.error(f"通过东财接口获取全球指数 {fund_code} 数据失败: {str(e)}")
-            em_df = None
+            em_df, codes_upper = None, None
 
         if em_df is not None and not em_df.empty:
             try:
-                code_col = '指数代码' if '指数代码' in em_df.columns else ('代码' if '代码' in em_df.columns else None)
                 name_col = '指数名称' if '指数名称' in em_df.columns else ('名称' if '名称' in em_df.columns else None)
                 price_col = '最新价' if '最新价' in em_df.columns else None
                 pct_col = '涨跌幅' if '涨跌幅' in em_df.columns else None
 
-                if code_col and price_col and pct_col:
-                    subset = pd.DataFrame()
-                    codes = em_df[code_col].astype(str).str.upper()
+                if codes_upper is not None and price_col and pct_col:
                     candidates = [code_upper]
-                    if info and info.get('symbol'):
-                        sym_str = str(info['symbol']).upper()
+                    if info and info.symbol:
+                        sym_str = str(info.symbol).upper()
                         if sym_str not in candidates:
                             candidates.append(sym_str)
-                    mask = codes.isin(candidates)
-                    subset = em_df[mask]
+                    subset = em_df[np.isin(codes_upper, candidates)]
 
                     if (subset is None or subset.empty) and name_col and alias_name:
                         names = em_df[name_col].astype(str)
@@ -510,17 +721,20 @@ def _format_index_output(df: pd.DataFrame, days: int) -> pd.DataFrame:
     """统一排序与截取最近 N 天输出。"""
     if df is None or df.empty:
         return pd.DataFrame()
-    out = df.copy()
+    out = df
     if DataColumns.DATE in out.columns:
-        out[DataColumns.DATE] = pd.to_datetime(out[DataColumns.DATE])
-        out = out.sort_values(DataColumns.DATE, ascending=False)
+        # 上游构建函数已解析日期并降序排列时，跳过重复解析与排序
+        if not pd.api.types.is_datetime64_any_dtype(out[DataColumns.DATE]):
+            # assign 返回新对象，无需先整体 copy 再修改
+            out = out.assign(**{DataColumns.DATE: pd.to_datetime(out[DataColumns.DATE])})
+        if not out[DataColumns.DATE].is_monotonic_decreasing:
+            out = out.sort_values(DataColumns.DATE, ascending=False)
     return out.head(days)
 
 def _build_global_index_df(spot: dict) -> pd.DataFrame:
     """由全球指数 spot 字典创建标准输出DataFrame。"""
     if not spot:
         return pd.DataFrame()
-    import datetime
     current_time = datetime.datetime.now()
     data = {
         DataColumns.DATE: [current_time],
@@ -535,27 +749,67 @@ def _build_cn_index_df(index_data: pd.DataFrame) -> pd.DataFrame:
         return pd.DataFrame()
     
     # 验证必需的列是否存在
-    required_cols = [DataColumns.DATE_FIELD, DataColumns.CLOSE]
-    if not validate_dataframe(index_data, required_cols):
-        logging.error(f"A股指数数据格式不正确，缺少必需列: {required_cols}")
+    if not validate_dataframe(index_data, RequiredColumns.CN_INDEX_DAILY):
+        logging.error(f"A股指数数据格式不正确，缺少必需列: {sorted(RequiredColumns.CN_INDEX_DAILY)}")
         return pd.DataFrame()
     
-    df = index_data.copy()
-    df[DataColumns.DATE] = pd.to_datetime(df[DataColumns.DATE_FIELD])
-    df[DataColumns.NET_VALUE] = df[DataColumns.CLOSE]
+    # 只取需要的列直接构建新 DataFrame，避免整表 copy 后再修改
+    df = pd.DataFrame({
+        # akshare 返回 YYYY-MM-DD，显式 format 走 C 解析快速路径，cache 去重相同日期字符串
+        DataColumns.DATE: pd.to_datetime(index_data[DataColumns.DATE_FIELD], format='%Y-%m-%d', cache=True),
+        DataColumns.NET_VALUE: index_data[DataColumns.CLOSE],
+    })
+    df = df.sort_values(DataColumns.DATE, ascending=False)
     
     if len(df) > 1:
-        df = df.sort_values(DataColumns.DATE, ascending=False)
-        prev_close = df[DataColumns.CLOSE].shift(-1)
-        df[DataColumns.DAILY_CHANGE] = ((df[DataColumns.CLOSE] - prev_close) / prev_close * 100).round(2)
-        df[DataColumns.DAILY_CHANGE] = df[DataColumns.DAILY_CHANGE].astype(str) + '%'
+        # 降序排列下 periods=-1 即与前一交易日收盘比较；缺失值保持为空而非 'nan%'
+        daily_change = (df[DataColumns.NET_VALUE].pct_change(periods=-1, fill_method=None) * 100).round(2)
+        # 以 Arrow 字符串类型存储，连续缓冲区比 object 列更省内存
+        df[DataColumns.DAILY_CHANGE] = daily_change.map('{:.2f}%'.format, na_action='ignore').astype(STRING_DTYPE)
     
-    df = df.sort_values(DataColumns.DATE, ascending=False)
     return df
 
+def _cn_index_spot_snapshot(source: str) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    获取 A 股指数全量实时快照（每个数据源每次监测运行只请求一次）
+    加锁访问缓存，线程池并发时未命中的线程等待首个请求完成而不是重复下载
+    
+    Args:
+        source: 数据源，'sina' 或 'em'
+        
+    Returns:
+        tuple: (快照 DataFrame, 小写代码列)
+    """
+    with _cn_index_spot_lock:
+        return _fetch_cn_index_spot_snapshot(source)
+
+@lru_cache(maxsize=2)
+def _fetch_cn_index_spot_snapshot(source: str) -> Tuple[pd.DataFrame, pd.Series]:
+    """
+    下载并校验 A 股指数全量实时快照（结果由 lru_cache 缓存）
+    
+    Args:
+        source: 数据源，'sina' 或 'em'
+        
+    Returns:
+        tuple: (快照 DataFrame, 小写代码列)，数据为空或格式不正确时返回空结果
+    """
+    if source == 'sina':
+        spot = ak.stock_zh_index_spot_sina()
+    else:
+        spot = ak.stock_zh_index_spot_em(symbol="沪深重要指数")
+    if spot is None or spot.empty:
+        return pd.DataFrame(), pd.Series(dtype=str)
+    # 验证必需的列是否存在
+    if not validate_dataframe(spot, RequiredColumns.CN_INDEX_SPOT):
+        logging.error(f"A股指数实时数据格式不正确，缺少必需列: {sorted(RequiredColumns.CN_INDEX_SPOT)}")
+        return pd.DataFrame(), pd.Series(dtype=str)
+    return spot, spot[DataColumns.CODE].astype(str).str.lower()
+
 def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
-    """使用 ak.stock_zh_index_spot_sina 获取实时指数快照并构造标准输出列。
+    """从 A 股指数实时快照（新浪优先，东财兜底）中筛选指定指数并构造标准输出列。
     兼容 symbol 为 'sh000001' / 'sz399001' 等，匹配时按后 6 位或完整代码归一。
+    快照由 _cn_index_spot_snapshot 缓存，本函数只做内存筛选。
     """
     try:
         if not symbol:
@@ -563,16 +817,10 @@ def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
 
         symbol_str = str(symbol).strip()
 
-        def _build_from_spot(spot: pd.DataFrame) -> pd.DataFrame:
+        def _build_from_spot(spot: pd.DataFrame, codes: pd.Series) -> pd.DataFrame:
             if spot is None or spot.empty:
                 return pd.DataFrame()
-            # 验证必需的列是否存在
-            required_cols = [DataColumns.CODE, DataColumns.LATEST_PRICE, DataColumns.CHANGE_PCT]
-            if not validate_dataframe(spot, required_cols):
-                logging.error(f"A股指数实时数据格式不正确，缺少必需列: {required_cols}")
-                return pd.DataFrame()
 
-            codes = spot[DataColumns.CODE].astype(str).str.lower()
             sym_lower = symbol_str.lower()
             core = symbol_str[-6:].lower()
             # 兼容 sh000001 / sz399001 / 000001 等形式（通过完整代码或后 6 位匹配）
@@ -581,8 +829,9 @@ def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
             if matches.empty:
                 return pd.DataFrame()
 
-            latest = safe_get_column_value(matches, 0, DataColumns.LATEST_PRICE)
-            pct = safe_get_column_value(matches, 0, DataColumns.CHANGE_PCT)
+            row = matches.iloc[0]
+            latest = safe_get_row_value(row, DataColumns.LATEST_PRICE)
+            pct = safe_get_row_value(row, DataColumns.CHANGE_PCT)
             ts = pd.Timestamp.now()
 
             data = {
@@ -594,8 +843,7 @@ def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
 
         # 1) 新浪优先
         try:
-            sina_spot = ak.stock_zh_index_spot_sina()
-            sina_df = _build_from_spot(sina_spot)
+            sina_df = _build_from_spot(*_cn_index_spot_snapshot('sina'))
             if sina_df is not None and not sina_df.empty:
                 return sina_df
         except Exception as e:
@@ -603,8 +851,7 @@ def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
 
         # 2) 东财兜底
         try:
-            em_spot = ak.stock_zh_index_spot_em(symbol="沪深重要指数")
-            em_df = _build_from_spot(em_spot)
+            em_df = _build_from_spot(*_cn_index_spot_snapshot('em'))
             if em_df is not None and not em_df.empty:
                 return em_df
         except Exception as e:
@@ -615,31 +862,34 @@ def _build_cn_index_spot_df(symbol: str) -> pd.DataFrame:
         logging.error(f"获取 A股指数实时数据失败: {symbol}, {e}")
         return pd.DataFrame()
 
-def get_specific_fund_data(fund_code: str, days: int = 1) -> pd.DataFrame:
+@daily_disk_cache
+def get_specific_fund_data(fund_code: str, days: int = 1, info: Optional[ResolvedCode] = None) -> pd.DataFrame:
     """
     直接获取指定基金代码或指数代码的历史数据
     
     Args:
         fund_code: 基金代码（如'270042'）或指数代码（如'000001', 'HSI'）
         days: 获取最近多少天的数据
+        info: 预先解析的 resolve_code 结果，为空时重新解析
         
     Returns:
         pd.DataFrame: 包含基金或指数历史数据的DataFrame
     """
     try:
-        info = resolve_code(fund_code)
-        if not info:
+        if info is None:
+            info = resolve_code(fund_code)
+        if info is None:
             return pd.DataFrame()
 
-        if info.get('type') == 'index':
+        if info.type == 'index':
             # 全球指数：实时（兼容 global_* 分区）
-            market = str(info.get('market') or '')
+            market = str(info.market or '')
             if market.startswith('global'):
-                spot = get_global_index_data(info.get('symbol', fund_code))
+                spot = get_global_index_data(info.symbol or fund_code)
                 return _format_index_output(_build_global_index_df(spot), days)
 
             # 中国指数：实时优先（始终优先使用当日实时，失败再回退历史）
-            symbol = info.get('symbol', fund_code)
+            symbol = info.symbol or fund_code
             spot_df = _build_cn_index_spot_df(symbol)
             if spot_df is not None and not spot_df.empty:
                 return _format_index_output(spot_df, days)
@@ -647,54 +897,58 @@ def get_specific_fund_data(fund_code: str, days: int = 1) -> pd.DataFrame:
             return _format_index_output(_build_cn_index_df(daily), days)
 
         # 基金：历史
-        fund_data = ak.fund_open_fund_info_em(symbol=info.get('symbol', fund_code), indicator="单位净值走势")
+        fund_data = ak.fund_open_fund_info_em(symbol=info.symbol or fund_code, indicator="单位净值走势")
         if fund_data.empty:
             return pd.DataFrame()
         
         # 验证必需的列是否存在
-        required_cols = [DataColumns.DATE, DataColumns.NET_VALUE]
-        if not validate_dataframe(fund_data, required_cols):
-            logging.error(f"基金数据格式不正确，缺少必需列: {required_cols}")
+        if not validate_dataframe(fund_data, RequiredColumns.FUND_HISTORY):
+            logging.error(f"基金数据格式不正确，缺少必需列: {sorted(RequiredColumns.FUND_HISTORY)}")
             return pd.DataFrame()
         
-        fund_data = fund_data.sort_values(DataColumns.DATE, ascending=False)
-        return fund_data.head(days)
+        # 只需最近 days 行：nlargest 部分选择 (O(n log k)) 代替整表排序
+        dates = pd.to_datetime(fund_data[DataColumns.DATE])
+        return fund_data.loc[dates.nlargest(days).index]
 
     except Exception as e:
         logging.error(f"获取 {fund_code} 数据失败: {str(e)}")
         return pd.DataFrame()
 
-def get_fund_summary(fund_code: str, days: int = 1) -> dict:
+def get_fund_summary(fund_code: str, days: int = 1, info: Optional[ResolvedCode] = None) -> dict:
     """
     获取基金或指数的简要分析数据
     
     Args:
         fund_code: 基金代码或指数代码
         days: 分析最近多少天的数据
+        info: 预先解析的 resolve_code 结果，为空时重新解析
         
     Returns:
         dict: 包含基金或指数分析数据的字典
     """
+    if info is None:
+        info = resolve_code(fund_code)
     try:
         # 获取基金数据
-        fund_data = get_specific_fund_data(fund_code, days + 1)  # 多获取一天用于计算涨跌幅
+        fund_data = get_specific_fund_data(fund_code, days + 1, info=info)  # 多获取一天用于计算涨跌幅
         
         if fund_data.empty:
             raise Exception("无法获取基金数据")
         
-        # 获取最新数据
+        # 获取最新数据（每行只定位一次，后续按列名取值）
         latest_row = fund_data.iloc[0]
-        latest_date = safe_get_column_value(fund_data, 0, DataColumns.DATE)
+        prev_row = fund_data.iloc[1] if len(fund_data) >= 2 else None
+        latest_date = safe_get_row_value(latest_row, DataColumns.DATE)
         if latest_date and hasattr(latest_date, 'strftime'):
             latest_date = latest_date.strftime('%Y-%m-%d')
         else:
             latest_date = 'N/A'
-        net_value = safe_get_column_value(fund_data, 0, DataColumns.NET_VALUE)
+        net_value = safe_get_row_value(latest_row, DataColumns.NET_VALUE)
         
         # 计算涨跌幅
-        if len(fund_data) >= 2:
+        if prev_row is not None:
             # 有前一天的数据，计算涨跌幅
-            prev_value = safe_get_column_value(fund_data, 1, DataColumns.NET_VALUE)
+            prev_value = safe_get_row_value(prev_row, DataColumns.NET_VALUE)
             
             if prev_value and prev_value != 0 and net_value is not None:
                 change_pct = ((net_value - prev_value) / prev_value) * 100
@@ -706,7 +960,7 @@ def get_fund_summary(fund_code: str, days: int = 1) -> dict:
                 trend = "➡️"
         else:
             # 只有一天的数据，尝试从日增长率列获取
-            daily_change = safe_get_column_value(fund_data, 0, DataColumns.DAILY_CHANGE)
+            daily_change = safe_get_row_value(latest_row, DataColumns.DAILY_CHANGE)
             if daily_change and pd.notna(daily_change):
                 change_str = str(daily_change).strip()
                 if change_str and change_str != '--' and change_str != 'N/A':
@@ -727,7 +981,7 @@ def get_fund_summary(fund_code: str, days: int = 1) -> dict:
         
         return {
             'fund_code': fund_code,
-            'fund_name': get_fund_name(fund_code),
+            'fund_name': get_fund_name(fund_code, info=info),
             'status': '正常',
             'latest_date': latest_date,
             'net_value': net_value,
@@ -738,7 +992,7 @@ def get_fund_summary(fund_code: str, days: int = 1) -> dict:
     except Exception as e:
         return {
             'fund_code': fund_code,
-            'fund_name': get_fund_name(fund_code),
+            'fund_name': get_fund_name(fund_code, info=info),
             'status': f'分析失败: {str(e)}',
             'latest_date': 'N/A',
             'net_value': 'N/A',
@@ -746,6 +1000,51 @@ def get_fund_summary(fund_code: str, days: int = 1) -> dict:
             'trend': '❓'
         }
 
+def _prewarm_shared_caches(codes: List[str]) -> None:
+    """在线程池启动前预热共享缓存，避免多个线程重复初始化"""
+    get_index_config()
+    _, fund_names = get_owned_funds()
+    resolved = [resolve_code(code) for code in codes]
+    needs_api_name = any(
+        info is not None and info.type == 'fund' and not (fund_names.get(code) or '').strip()
+        for code, info in zip(codes, resolved)
+    )
+    if needs_api_name:
+        _load_fund_name_api_cache()
+    needs_cn_spot = any(
+        info is not None and info.type == 'index' and not str(info.market or '').startswith('global')
+        for info in resolved
+    )
+    if needs_cn_spot:
+        try:
+            _cn_index_spot_snapshot('sina')
+        except Exception as e:
+            logging.error(f"预取新浪 A股指数实时快照失败: {e}")
+
+def fetch_fund_summaries(codes: List[str], days: int = 1) -> List[dict]:
+    """
+    并发获取多个基金或指数的分析数据
+    
+    Args:
+        codes: 基金代码或指数代码列表
+        days: 分析最近多少天的数据
+        
+    Returns:
+        list: 与 codes 顺序一致的分析数据列表
+    """
+    if not codes:
+        return []
+    # 每次监测运行重新获取一次 A 股指数快照，运行内各指数共享
+    _fetch_cn_index_spot_snapshot.cache_clear()
+    _prewarm_shared_caches(codes)
+    owned_meta = get_owned_meta()
+    max_workers = min(ConcurrencyConfig.MAX_WORKERS, len(codes))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda code: get_fund_summary(code, days, info=owned_meta.get(code)),
+            codes,
+        ))
+
 def monitor_owned_funds(days: int = 1):
     """
     监测已购买的基金和关注的指数
@@ -763,9 +1062,11 @@ def monitor_owned_funds(days: int = 1):
         print("未配置任何基金代码或指数代码！")
         return
     
-    # 统计基金和指数数量
-    fund_count = sum(1 for code in owned_funds if not is_index_code(code))
-    index_count = sum(1 for code in owned_funds if is_index_code(code))
+    # 统计基金和指数数量（基于一次性解析的结果表）
+    owned_meta = get_owned_meta()
+    resolved = [owned_meta.get(code) for code in owned_funds]
+    index_count = sum(1 for info in resolved if info is not None and info.type == 'index')
+    fund_count = len(owned_funds) - index_count
     
     if fund_count > 0 and index_count > 0:
         print(f"正在监测 {fund_count} 只基金和 {index_count} 个指数 (最近 {days} 天)")
@@ -774,39 +1075,32 @@ def monitor_owned_funds(days: int = 1):
     else:
         print(f"正在监测 {index_count} 个指数 (最近 {days} 天)")
     
-    # 获取所有基金的数据
-    fund_summaries = []
-    for fund_code in owned_funds:
-        summary = get_fund_summary(fund_code, days)
-        fund_summaries.append(summary)
+    # 获取所有基金的数据（I/O 密集，线程池并发请求；map 保持配置顺序）
+    fund_summaries = fetch_fund_summaries(owned_funds, days)
     
     print("\n基金/指数监测报告")
     print("=" * 80)
     
-    # 创建表格标题
-    print(f"{'代码':<8} {'名称':<30} {'最新日期':<12} {'净值/点位':<10} {'涨跌幅':<10} {'趋势':<4}")
-    print("-" * 80)
-    
-    # 显示每只基金的数据
-    total_funds = len(fund_summaries)
-    success_count = 0
-    up_count = 0
-    down_count = 0
+    # 一次性构建表格并由 pandas 统一格式化输出（按东亚字符宽度对齐中文名称）
+    summary_df = pd.DataFrame(fund_summaries)
+    names = summary_df['fund_name'].astype(str)
+    summary_df['fund_name'] = names.where(names.str.len() <= 30, names.str.slice(0, 27) + "...")
+    table = summary_df[['fund_code', 'fund_name', 'latest_date', 'net_value', 'change_pct', 'trend']].rename(columns={
+        'fund_code': '代码',
+        'fund_name': '名称',
+        'latest_date': '最新日期',
+        'net_value': '净值/点位',
+        'change_pct': '涨跌幅',
+        'trend': '趋势',
+    })
+    with pd.option_context('display.unicode.east_asian_width', True):
+        print(table.to_string(index=False))
     
-    for summary in fund_summaries:
-        item_name = summary['fund_name']
-        if len(item_name) > 30:
-            item_name = item_name[:27] + "..."
-        
-        print(f"{summary['fund_code']:<8} {item_name:<30} {summary['latest_date']:<12} {summary['net_value']:<10} {summary['change_pct']:<10} {summary['trend']:<4}")
-        
-        # 统计
-        if summary['status'] == '正常':
-            success_count += 1
-            if summary['trend'] == '📈':
-                up_count += 1
-            elif summary['trend'] == '📉':
-                down_count += 1
+    # 统计（向量化计数）
+    trend_counts = summary_df.loc[summary_df['status'] == '正常', 'trend'].value_counts()
+    success_count = int(trend_counts.sum())
+    up_count = int(trend_counts.get('📈', 0))
+    down_count = int(trend_counts.get('📉', 0))
     
     print("-" * 80)
     print(f"上涨: {up_count} 只  下跌: {down_count} 只  平盘: {success_count - up_count - down_count} 只")
@@ -1,19 +1,88 @@
 import akshare as ak
+import numpy as np
 import pandas as pd
 import logging
+import os
 import sys
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Callable
+import threading
 import time
+from itertools import chain
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Python 版本检查 (AKShare 要求 3.9+)
 if sys.version_info < (3, 9):
     raise RuntimeError("TickEye requires Python 3.9 or higher (AKShare requirement)")
 
+# 与 fund_analysis.py 共用的仓库根目录模块：仓库根目录需在模块搜索路径中（如在根目录下以 legacy.monitor.fetcher 导入）
+from market_time import CST, NAV_UPDATE_TIME, last_nav_update
+
+# 可选依赖：pyarrow 字符串类型的 str 方法（如正则匹配）由 C++ 内核实现，Feather 缓存可内存映射读取；未安装时回退 pandas 默认实现
+try:
+    from pyarrow import feather
+    CODE_DTYPE = 'string[pyarrow]'
+except ImportError:
+    feather = None
+    CODE_DTYPE = 'string'
+
+# 可选依赖：numba 将涨跌幅计算编译为单次循环，未安装时使用 NumPy 向量化实现
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
 logger = logging.getLogger(__name__)
 
 # 简化的缓存配置
 CACHE_EXPIRE_TIME = 120  # 2分钟，适合交易时段的数据变化
+FUND_CODE_PATTERN = r'\d{6}'  # 有效基金代码：6位数字
+FAIL_TTL = 30  # 请求失败后的冷却时间，期间直接返回缓存，避免接口故障时反复重试
+UNIVERSE_THRESHOLD = 200  # 关注基金少于该数量时逐只请求，不再下载全市场数据
+MAX_WORKERS = 8  # 逐只请求的并发数，避免触发接口限流
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'tickeye')  # 本地缓存目录
+MARKET_OPEN_TIME = (9, 30)  # 交易日开盘时间，开盘至净值公布期间数据持续变化
+FUND_NAME_TTL = 24 * 3600  # 基金名称变化很少，名称表缓存 24 小时
+
+
+def _is_market_active() -> bool:
+    """当前是否处于数据变化时段：交易日开盘至当晚净值公布（节假日按交易日处理，只会多刷新）"""
+    now = datetime.now(CST)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN_TIME <= (now.hour, now.minute) < NAV_UPDATE_TIME
+
+
+def _is_fresh(fetch_time: float) -> bool:
+    """
+    全量数据缓存是否仍可使用：交易时段按 CACHE_EXPIRE_TIME 过期；
+    非交易时段数据不再变化，最近一次净值公布后获取的缓存不论多旧都直接复用
+    """
+    if time.time() - fetch_time < CACHE_EXPIRE_TIME:
+        return True
+    return not _is_market_active() and fetch_time >= last_nav_update()
+
+
+def _pct_change_numpy(values: np.ndarray) -> np.ndarray:
+    """按日期降序的净值序列计算日涨跌幅(%)，最早一天为 NaN"""
+    out = np.full(len(values), np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        out[:-1] = (values[:-1] - values[1:]) / values[1:] * 100.0
+    return np.round(out, 4)
+
+
+def _pct_change_loop(values: np.ndarray) -> np.ndarray:
+    """_pct_change_numpy 的单次循环版本，供 numba 编译"""
+    n = len(values)
+    out = np.empty(n)
+    for i in range(n - 1):
+        out[i] = round((values[i] - values[i + 1]) / values[i + 1] * 100.0, 4)
+    if n > 0:
+        out[n - 1] = np.nan
+    return out
+
+
+_pct_change = njit(cache=True, error_model='numpy')(_pct_change_loop) if njit is not None else _pct_change_numpy
 
 
 class SimpleFundDataFetcher:
@@ -22,24 +91,102 @@ class SimpleFundDataFetcher:
     def __init__(self):
         self._last_fetch_time = {}  # 分类型的最后获取时间
         self._cache = {}  # 分类型的缓存数据
+        self._code_index = {}  # 分类型的 (数据, {基金代码: 行位置}) 索引，数据刷新后重建
+        self._fetch_locks = {cache_type: threading.Lock() for cache_type in ('open_fund', 'index_fund', 'fund_names')}
+        self._history_cache = {}  # {(基金代码, 指标): (获取时间, 历史数据)}，净值公布后失效
     
     def _is_cache_valid(self, cache_type: str) -> bool:
         """检查指定类型的缓存是否有效"""
         if cache_type not in self._last_fetch_time:
             return False
-        return time.time() - self._last_fetch_time[cache_type] < CACHE_EXPIRE_TIME
+        return _is_fresh(self._last_fetch_time[cache_type])
+    
+    def _is_recently_failed(self, cache_type: str) -> bool:
+        """检查指定类型最近一次请求是否在冷却时间内失败"""
+        return time.time() - self._last_fetch_time.get(f"{cache_type}:fail", 0) < FAIL_TTL
+    
+    def _disk_cache_path(self, cache_type: str, ext: str = 'parquet') -> str:
+        return os.path.join(CACHE_DIR, f"{cache_type}.{ext}")
+    
+    def _load_disk_cache(self, cache_type: str) -> Optional[pd.DataFrame]:
+        """
+        读取未过期的全量数据本地缓存并回填内存缓存，缓存时间以文件修改时间为准
+        
+        全量数据以未压缩的 Feather (Arrow IPC) 格式保存，内存映射读取，
+        多个进程同时读取时共享同一份页缓存
+        """
+        path = self._disk_cache_path(cache_type, 'feather')
+        try:
+            mtime = os.path.getmtime(path)
+            if not _is_fresh(mtime):
+                return None
+            if feather is not None:
+                df = feather.read_table(path, memory_map=True).to_pandas()
+            else:
+                df = pd.read_feather(path)
+        except (OSError, ValueError):
+            # 文件不存在或内容损坏时视为未命中；其他异常（如调用错误）不在此掩盖
+            return None
+        
+        self._cache[cache_type] = df
+        self._last_fetch_time[cache_type] = mtime
+        return df
+    
+    def _load_history_disk_cache(self, cache_type: str, valid_since: float) -> Optional[pd.DataFrame]:
+        """读取 valid_since 之后写入的 parquet 本地缓存（历史净值、基金名称表）"""
+        path = self._disk_cache_path(cache_type)
+        try:
+            if os.path.getmtime(path) < valid_since:
+                return None
+            return pd.read_parquet(path)
+        except Exception:
+            return None
+    
+    def _save_disk_cache(self, df: pd.DataFrame, cache_type: str, ext: str = 'parquet') -> None:
+        """原子写入本地缓存，写入失败不影响主流程"""
+        path = self._disk_cache_path(cache_type, ext)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"  # 进程号+线程号，并发写同一文件互不干扰
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if ext == 'feather':
+                df.to_feather(tmp_path, compression='uncompressed')  # 不压缩才能直接内存映射
+            else:
+                df.to_parquet(tmp_path, compression='zstd', index=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.debug("写入本地缓存 %s 失败: %s", path, e)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
     
     def _clean_data(self, df: pd.DataFrame) -> pd.DataFrame:
         """基本的数据清理，移除无效行"""
         if df is None or df.empty:
             return df
         
-        # 移除基金代码为空的行
-        if '基金代码' in df.columns:
-            df = df.dropna(subset=['基金代码'])
-            df = df[df['基金代码'].str.len() == 6]  # 基金代码应该是6位
+        if '基金代码' not in df.columns:
+            return self._compact_dtypes(df.reset_index(drop=True))
         
-        return df.reset_index(drop=True)
+        # 移除基金代码为空或不是6位数字的行：一个掩码、一次按位置取行
+        codes = df['基金代码'].astype(CODE_DTYPE)
+        mask = codes.str.fullmatch(FUND_CODE_PATTERN, na=False).to_numpy(dtype=bool)
+        df = df.take(np.flatnonzero(mask))
+        df.index = pd.RangeIndex(len(df))  # take 已返回新对象，直接重置索引，无需 reset_index 再复制
+        return self._compact_dtypes(df)
+    
+    def _compact_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        压缩缓存数据的内存占用：基金代码转为分类类型，
+        纯字符串的 object 列（基金简称等）转为 Arrow 字符串类型，列式连续存储；
+        净值等浮点列保持 float64，降精度会改变展示的净值并影响阈值比较
+        """
+        if '基金代码' in df.columns:
+            df['基金代码'] = df['基金代码'].astype('category')
+        for col in df.select_dtypes('object').columns:
+            if pd.api.types.infer_dtype(df[col], skipna=True) == 'string':
+                df[col] = df[col].astype(CODE_DTYPE)
+        return df
     
     def get_open_fund_data(self, force_refresh: bool = False) -> Optional[pd.DataFrame]:
         """
@@ -51,35 +198,7 @@ class SimpleFundDataFetcher:
         Returns:
             pd.DataFrame: 基金数据，使用 AKShare 的原始列名
         """
-        cache_key = 'open_fund'
-        
-        # 检查缓存
-        if not force_refresh and self._is_cache_valid(cache_key):
-            logger.debug("使用缓存的开放式基金数据")
-            return self._cache.get(cache_key)
-        
-        try:
-            logger.info("正在获取开放式基金数据...")
-            df = ak.fund_open_fund_info_em()
-            
-            if df is not None and not df.empty:
-                df = self._clean_data(df)
-                self._cache[cache_key] = df
-                self._last_fetch_time[cache_key] = time.time()
-                logger.info(f"成功获取 {len(df)} 只开放式基金数据")
-                return df
-            else:
-                logger.warning("获取的开放式基金数据为空")
-                return None
-                
-        except Exception as e:
-            logger.error(f"获取开放式基金数据失败: {e}")
-            # 返回缓存数据作为备用
-            cached_data = self._cache.get(cache_key)
-            if cached_data is not None:
-                logger.warning("API失败，返回缓存数据")
-                return cached_data
-            return None
+        return self._get_universe('open_fund', '开放式基金', ak.fund_open_fund_info_em, force_refresh)
     
     def get_index_fund_data(self, force_refresh: bool = False) -> Optional[pd.DataFrame]:
         """
@@ -91,35 +210,57 @@ class SimpleFundDataFetcher:
         Returns:
             pd.DataFrame: 基金数据，使用 AKShare 的原始列名
         """
-        cache_key = 'index_fund'
-        
+        return self._get_universe('index_fund', '指数基金', ak.fund_etf_fund_info_em, force_refresh)
+    
+    def _get_universe(self, cache_key: str, label: str, fetch_func: Callable[[], pd.DataFrame],
+                      force_refresh: bool) -> Optional[pd.DataFrame]:
+        """按 内存缓存 -> 本地缓存 -> 网络请求 的顺序获取全量数据"""
         # 检查缓存
         if not force_refresh and self._is_cache_valid(cache_key):
-            logger.debug("使用缓存的指数基金数据")
+            logger.debug("使用缓存的%s数据", label)
             return self._cache.get(cache_key)
         
-        try:
-            logger.info("正在获取指数基金数据...")
-            df = ak.fund_etf_fund_info_em()
+        # 同类型数据同一时间只请求一次，并发调用方等待并复用第一个请求的结果
+        with self._fetch_locks[cache_key]:
+            if not force_refresh and self._is_cache_valid(cache_key):
+                logger.debug("使用缓存的%s数据", label)
+                return self._cache.get(cache_key)
             
-            if df is not None and not df.empty:
-                df = self._clean_data(df)
-                self._cache[cache_key] = df
-                self._last_fetch_time[cache_key] = time.time()
-                logger.info(f"成功获取 {len(df)} 只指数基金数据")
-                return df
-            else:
-                logger.warning("获取的指数基金数据为空")
-                return None
+            # 进程重启后优先复用本地缓存
+            if not force_refresh:
+                df = self._load_disk_cache(cache_key)
+                if df is not None:
+                    logger.debug("使用本地缓存的%s数据", label)
+                    return df
+            
+            if not force_refresh and self._is_recently_failed(cache_key):
+                logger.debug("%s数据请求最近失败，冷却期内返回缓存数据", label)
+                return self._cache.get(cache_key)
+            
+            try:
+                logger.info("正在获取%s数据...", label)
+                df = fetch_func()
                 
-        except Exception as e:
-            logger.error(f"获取指数基金数据失败: {e}")
-            # 返回缓存数据作为备用
-            cached_data = self._cache.get(cache_key)
-            if cached_data is not None:
-                logger.warning("API失败，返回缓存数据")
-                return cached_data
-            return None
+                if df is not None and not df.empty:
+                    df = self._clean_data(df)
+                    self._cache[cache_key] = df
+                    self._last_fetch_time[cache_key] = time.time()
+                    self._save_disk_cache(df, cache_key, 'feather')
+                    logger.info("成功获取 %d 只%s数据", len(df), label)
+                    return df
+                else:
+                    logger.warning("获取的%s数据为空", label)
+                    return None
+                    
+            except Exception as e:
+                logger.error("获取%s数据失败: %s", label, e)
+                self._last_fetch_time[f"{cache_key}:fail"] = time.time()
+                # 返回缓存数据作为备用
+                cached_data = self._cache.get(cache_key)
+                if cached_data is not None:
+                    logger.warning("API失败，返回缓存数据")
+                    return cached_data
+                return None
     
     def get_specific_funds(self, codes: List[str], fund_type: str = 'open') -> Optional[pd.DataFrame]:
         """
@@ -135,24 +276,110 @@ class SimpleFundDataFetcher:
         if not codes:
             return None
         
-        # 直接获取全量数据并筛选 (AKShare 的简单方式)
+        # 关注列表较小时逐只请求，避免下载全市场数据再筛选
+        if len(codes) < UNIVERSE_THRESHOLD:
+            return self._get_funds_by_code(codes, fund_type)
+        
+        # 关注列表较大时获取全量数据并筛选 (AKShare 的简单方式)
         if fund_type == 'open':
+            cache_key = 'open_fund'
             all_data = self.get_open_fund_data()
         else:
+            cache_key = 'index_fund'
             all_data = self.get_index_fund_data()
         
         if all_data is None or all_data.empty:
             return None
         
-        # 筛选指定的基金代码
+        # 筛选指定的基金代码：按代码索引直接定位行，不扫描全量数据
         if '基金代码' in all_data.columns:
-            filtered_data = all_data[all_data['基金代码'].isin(codes)]
-            logger.info(f"筛选出 {len(filtered_data)}/{len(codes)} 只基金")
+            code_index = self._get_code_index(cache_key, all_data)
+            positions = [code_index[code] for code in dict.fromkeys(codes) if code in code_index]
+            filtered_data = all_data.iloc[positions]
+            logger.info("筛选出 %d/%d 只基金", len(filtered_data), len(codes))
             return filtered_data
         else:
             logger.error("数据中缺少'基金代码'列")
             return None
     
+    def _get_code_index(self, cache_type: str, df: pd.DataFrame) -> Dict[str, int]:
+        """获取 {基金代码: 行位置} 索引，仅在数据对象变化时重建"""
+        cached = self._code_index.get(cache_type)
+        if cached is None or cached[0] is not df:
+            cached = (df, {code: pos for pos, code in enumerate(df['基金代码'].to_numpy())})
+            self._code_index[cache_type] = cached
+        return cached[1]
+    
+    def _fetch_latest_nav(self, code: str, fund_type: str) -> Optional[Dict[str, Any]]:
+        """获取单只基金最新一期净值，返回带'基金代码'字段的单行记录"""
+        try:
+            if fund_type == 'open':
+                df = ak.fund_open_fund_info_em(symbol=code, indicator="单位净值走势")
+            else:
+                df = ak.fund_etf_fund_info_em(fund=code)
+        except Exception as e:
+            logger.warning("获取基金 %s 净值失败: %s", code, e)
+            return None
+        
+        if df is None or df.empty or '净值日期' not in df.columns:
+            return None
+        
+        latest = df.loc[pd.to_datetime(df['净值日期']).idxmax()]
+        return {'基金代码': code, **latest.to_dict()}
+    
+    def _get_funds_by_code(self, codes: List[str], fund_type: str) -> Optional[pd.DataFrame]:
+        """逐只并发获取指定基金的最新净值，顺序与 codes 一致"""
+        unique_codes = list(dict.fromkeys(codes))
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(unique_codes))) as executor:
+            records = [
+                record for record in executor.map(lambda code: self._fetch_latest_nav(code, fund_type), unique_codes)
+                if record is not None
+            ]
+        
+        if not records:
+            logger.info("筛选出 0/%d 只基金", len(codes))
+            return None
+        
+        # 由记录列表一次构建 DataFrame，避免逐个拼接单行 DataFrame 时的索引对齐开销
+        filtered_data = pd.DataFrame.from_records(records)
+        
+        # 单只基金的净值接口不返回名称，由基金名称表补充，保证警告信息中显示基金简称
+        fund_names = self._get_fund_names()
+        if fund_names:
+            found_codes = filtered_data['基金代码']
+            # 名称表中查不到的代码（如新发基金）以代码代替，避免警告中出现 nan
+            filtered_data.insert(1, '基金简称', found_codes.map(fund_names).fillna(found_codes))
+        logger.info("筛选出 %d/%d 只基金", len(filtered_data), len(codes))
+        return filtered_data
+    
+    def _get_fund_names(self) -> Dict[str, str]:
+        """获取 {基金代码: 基金简称} 映射（内存 -> 本地缓存 -> 网络请求），失败时返回空映射"""
+        names = self._cache.get('fund_names')
+        if names is not None:
+            return names
+        
+        with self._fetch_locks['fund_names']:
+            names = self._cache.get('fund_names')
+            if names is not None:
+                return names
+            
+            df = self._load_history_disk_cache('fund_names', time.time() - FUND_NAME_TTL)
+            if df is None:
+                try:
+                    df = ak.fund_name_em()
+                except Exception as e:
+                    logger.warning("获取基金名称表失败: %s", e)
+                    return {}
+                if df is None or df.empty or not {'基金代码', '基金简称'} <= set(df.columns):
+                    logger.warning("基金名称表为空或缺少必要字段")
+                    return {}
+                df = df[['基金代码', '基金简称']]
+                self._save_disk_cache(df, 'fund_names')
+            
+            names = dict(zip(df['基金代码'].astype(str), df['基金简称']))
+            self._cache['fund_names'] = names
+            return names
+    
     def get_funds_by_config(self, config: Dict[str, Any]) -> Optional[pd.DataFrame]:
         """
         根据配置获取基金数据 - 简化版
@@ -166,27 +393,37 @@ class SimpleFundDataFetcher:
         if not config or 'rules' not in config:
             return None
         
-        all_codes = set()
+        # 收集所有需要监控的基金代码（去重并保持配置顺序）
+        codes_list = list(dict.fromkeys(chain.from_iterable(
+            rule.get('fund_codes', [rule['fund_code']] if 'fund_code' in rule else [])
+            for rule in config['rules']
+        )))
         
-        # 收集所有需要监控的基金代码
-        for rule in config['rules']:
-            if 'fund_codes' in rule:
-                all_codes.update(rule['fund_codes'])
-            elif 'fund_code' in rule:
-                all_codes.add(rule['fund_code'])
-        
-        if not all_codes:
+        if not codes_list:
             logger.warning("配置中没有找到基金代码")
             return None
         
-        codes_list = list(all_codes)
-        logger.info(f"从配置中提取到 {len(codes_list)} 只基金代码")
+        logger.info("从配置中提取到 %d 只基金代码", len(codes_list))
         
-        # 分别获取开放式和指数基金数据
-        open_data = self.get_specific_funds(codes_list, 'open')
-        index_data = self.get_specific_funds(codes_list, 'index')
+        if len(codes_list) >= UNIVERSE_THRESHOLD:
+            # 两类全量数据来自不同接口，并行下载；指数基金中与开放式重复的代码随后剔除
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                open_future = executor.submit(self.get_specific_funds, codes_list, 'open')
+                index_future = executor.submit(self.get_specific_funds, codes_list, 'index')
+                open_data, index_data = open_future.result(), index_future.result()
+            if (open_data is not None and index_data is not None
+                    and '基金代码' in open_data.columns and '基金代码' in index_data.columns):
+                index_data = index_data[~index_data['基金代码'].isin(set(open_data['基金代码']))]
+        else:
+            # 逐只请求时先获取开放式基金，指数基金只查询开放式数据中未覆盖的代码
+            open_data = self.get_specific_funds(codes_list, 'open')
+            remaining_codes = codes_list
+            if open_data is not None and '基金代码' in open_data.columns:
+                found_codes = set(open_data['基金代码'])
+                remaining_codes = [code for code in codes_list if code not in found_codes]
+            index_data = self.get_specific_funds(remaining_codes, 'index') if remaining_codes else None
         
-        # 合并数据
+        # 合并数据（两部分代码互不重叠，无需去重）
         combined_data = []
         if open_data is not None and not open_data.empty:
             combined_data.append(open_data)
@@ -195,10 +432,7 @@ class SimpleFundDataFetcher:
         
         if combined_data:
             result = pd.concat(combined_data, ignore_index=True)
-            # 去重
-            if '基金代码' in result.columns:
-                result = result.drop_duplicates(subset=['基金代码'])
-            logger.info(f"最终获取到 {len(result)} 只基金数据")
+            logger.info("最终获取到 %d 只基金数据", len(result))
             return result
         
         return None
@@ -206,12 +440,14 @@ class SimpleFundDataFetcher:
     def get_cache_info(self) -> Dict[str, Any]:
         """获取缓存信息"""
         info = {}
-        for cache_type in ['open_fund', 'index_fund']:
+        for cache_type in ('open_fund', 'index_fund'):
+            entry = self._cache.get(cache_type)
+            last_update = self._last_fetch_time.get(cache_type)
             info[cache_type] = {
-                'cached': cache_type in self._cache,
-                'valid': self._is_cache_valid(cache_type),
-                'last_update': self._last_fetch_time.get(cache_type),
-                'record_count': len(self._cache[cache_type]) if cache_type in self._cache else 0
+                'cached': entry is not None,
+                'valid': last_update is not None and _is_fresh(last_update),
+                'last_update': last_update,
+                'record_count': len(entry) if entry is not None else 0
             }
         return info
     
@@ -226,35 +462,56 @@ class SimpleFundDataFetcher:
         Returns:
             pd.DataFrame: 包含日期、净值、涨跌幅等信息的历史数据
         """
+        indicator = "单位净值走势"  # 列：净值日期、单位净值、日增长率
+        cache_key = (fund_code, indicator)
+        valid_since = last_nav_update()
+        
+        # 内存缓存 -> 最近一次净值公布后写入的本地缓存 -> 网络请求
+        cached = self._history_cache.get(cache_key)
+        if cached is not None and cached[0] >= valid_since:
+            return cached[1]
+        
+        disk_cache_type = os.path.join('history', f"{fund_code}_{indicator}")
+        df = self._load_history_disk_cache(disk_cache_type, valid_since)
+        if df is not None:
+            self._history_cache[cache_key] = (time.time(), df)
+            return df
+        
         try:
-            logger.info(f"正在获取基金 {fund_code} 的历史净值数据...")
+            logger.info("正在获取基金 %s 的历史净值数据...", fund_code)
             
             # 使用 AKShare 获取基金历史净值数据
-            df = ak.fund_open_fund_info_em(fund=fund_code, indicator="历史净值")
+            df = ak.fund_open_fund_info_em(symbol=fund_code, indicator=indicator)
             
             if df is not None and not df.empty:
-                # 数据清理和处理
-                df = df.copy()
+                # 数据清理和处理：接口每次返回新对象，可直接原地修改，无需复制
                 
                 # 确保日期列存在并转换为日期格式
                 if '净值日期' in df.columns:
                     df['净值日期'] = pd.to_datetime(df['净值日期'])
-                    df = df.sort_values('净值日期', ascending=False)  # 按日期降序排列
+                    # 按日期降序排列：接口通常按升序返回，直接反转即可，仅乱序时才排序
+                    if df['净值日期'].is_monotonic_increasing:
+                        df = df.iloc[::-1].reset_index(drop=True)
+                    elif df['净值日期'].is_monotonic_decreasing:
+                        df = df.reset_index(drop=True)
+                    else:
+                        df = df.sort_values('净值日期', ascending=False, ignore_index=True)
                 
                 # 计算每日涨跌幅（如果数据中没有的话）
                 if '单位净值' in df.columns and '日增长率' not in df.columns:
                     df['单位净值'] = pd.to_numeric(df['单位净值'], errors='coerce')
-                    df['前日净值'] = df['单位净值'].shift(-1)
-                    df['计算涨跌幅'] = ((df['单位净值'] - df['前日净值']) / df['前日净值'] * 100).round(4)
+                    df['计算涨跌幅'] = _pct_change(df['单位净值'].to_numpy(dtype=np.float64))
                 
-                logger.info(f"成功获取基金 {fund_code} 的 {len(df)} 条历史数据")
+                self._history_cache[cache_key] = (time.time(), df)
+                self._save_disk_cache(df, disk_cache_type)
+                logger.info("成功获取基金 %s 的 %d 条历史数据", fund_code, len(df))
                 return df
             else:
-                logger.warning(f"基金 {fund_code} 的历史数据为空")
+                logger.warning("基金 %s 的历史数据为空", fund_code)
                 return None
                 
         except Exception as e:
-            logger.error(f"获取基金 {fund_code} 历史数据失败: {e}")
+            logger.error("获取基金 %s 历史数据失败: %s", fund_code, e)
             return None
     
     def get_fund_daily_changes(self, fund_code: str, days: int = 30) -> Optional[pd.DataFrame]:
@@ -273,23 +530,20 @@ class SimpleFundDataFetcher:
         if history_data is None or history_data.empty:
             return None
         
-        # 取最近N天的数据
-        recent_data = history_data.head(days).copy()
-        
         # 选择需要的列
         columns_to_keep = ['净值日期', '单位净值']
-        if '日增长率' in recent_data.columns:
-            columns_to_keep.append('日增长率')
-        elif '计算涨跌幅' in recent_data.columns:
-            columns_to_keep.append('计算涨跌幅')
-        
-        result = recent_data[columns_to_keep].copy()
-        
-        # 重命名列以便统一使用
-        if '日增长率' in result.columns:
-            result = result.rename(columns={'日增长率': '涨跌幅(%)'})
-        elif '计算涨跌幅' in result.columns:
-            result = result.rename(columns={'计算涨跌幅': '涨跌幅(%)'})
+        change_col = None
+        if '日增长率' in history_data.columns:
+            change_col = '日增长率'
+        elif '计算涨跌幅' in history_data.columns:
+            change_col = '计算涨跌幅'
+        if change_col:
+            columns_to_keep.append(change_col)
+        
+        # 先按行切片取最近N天再选列，只复制N行需要的列；重命名返回新对象，不影响缓存的历史数据
+        result = history_data.iloc[:days][columns_to_keep]
+        if change_col:
+            result = result.rename(columns={change_col: '涨跌幅(%)'})
         
         return result
 
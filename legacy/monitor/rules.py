@@ -1,7 +1,9 @@
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional, Tuple
+import numpy as np
 import pandas as pd
 import logging
 from abc import ABC, abstractmethod
+from functools import lru_cache
 import re
 
 logger = logging.getLogger(__name__)
@@ -15,12 +17,13 @@ class Rule(ABC):
         self.description = description
     
     @abstractmethod
-    def check(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def check(self, data: pd.DataFrame, ctx: Optional['RuleContext'] = None) -> List[Dict[str, Any]]:
         """
         检查规则是否触发
         
         Args:
             data: 基金数据DataFrame
+            ctx: 同一批次规则共享的数据上下文，为空时根据 data 重新构建
             
         Returns:
             List[Dict]: 触发的警告信息列表，每个字典包含：
@@ -31,6 +34,56 @@ class Rule(ABC):
                 - rule_name: 规则名称
         """
         pass
+    
+    # 规则依赖的字段：{RuleContext 中的列属性: 缺失时提示的字段名}
+    REQUIRED_FIELDS: Dict[str, str] = {}
+    
+    def _resolve_context(self, data: pd.DataFrame, ctx: Optional['RuleContext']) -> Optional['RuleContext']:
+        """复用批次上下文（为空时根据 data 构建）并检查必要字段，字段缺失时返回 None"""
+        if ctx is None:
+            ctx = RuleContext(data)
+        missing = [label for attr, label in self.REQUIRED_FIELDS.items() if not getattr(ctx, attr)]
+        if missing:
+            logger.error(f"缺少必要字段: {missing}")
+            return None
+        return ctx
+    
+    def _emit_alerts(self, codes: np.ndarray, names: np.ndarray, values: np.ndarray,
+                     mask: np.ndarray, template: Tuple[str, str, str]) -> List[Dict[str, Any]]:
+        """
+        按触发掩码（布尔掩码或行位置）批量生成警告
+        
+        Args:
+            codes: 基金代码数组
+            names: 基金名称数组
+            values: 触发值数组
+            mask: 触发的行
+            template: 消息模板 (触发值前缀, 触发值格式, 消息后缀)，
+                      消息为 "基金 名称(代码) " + 前缀 + 格式化后的触发值 + 后缀
+            
+        Returns:
+            List[Dict]: 警告信息列表
+        """
+        codes, names, values = codes[mask], names[mask], values[mask]
+        if len(codes) == 0:
+            return []
+        
+        # 消息整列拼接，不再逐行格式化；先转为 Python 字符串，与 str() 的结果一致（含空值）
+        head, value_fmt, tail = template
+        messages = (
+            "基金 " + pd.Series(np.asarray(names, dtype=object).astype(str), dtype=object)
+            + "(" + pd.Series(np.asarray(codes, dtype=object).astype(str), dtype=object) + ") "
+            + head + np.char.mod(value_fmt, values) + tail
+        )
+        
+        # 触发的基金按列组成一批，最后一次性转换为警告字典列表
+        return pd.DataFrame({
+            'fund_code': codes,
+            'fund_name': names,
+            'message': messages.to_numpy(),
+            'value': values,
+            'rule_name': self.name
+        }).to_dict('records')
 
 
 class FieldHelper:
@@ -65,29 +118,68 @@ class FieldHelper:
         
         return None
     
+    # 各类字段的匹配模式，按优先级排列
+    COLUMN_PATTERNS = {
+        'code': ['基金代码', 'fund_code', '代码'],
+        'name': ['基金简称', '基金名称', 'fund_name', '简称', '名称'],
+        'value': ['单位净值', 'net_value', '净值'],
+        'rate': ['日增长率', '增长率', '涨跌率', '涨幅', 'change_rate'],
+    }
+    
+    # object 列低于该行数时改用列表推导解析百分比
+    LISTCOMP_MAX_ROWS = 50_000
+    
+    @staticmethod
+    def build_column_map(df: pd.DataFrame) -> Dict[str, Optional[str]]:
+        """
+        一次扫描列名，解析所有字段对应的列，结果按列名元组缓存
+        
+        Args:
+            df: DataFrame
+            
+        Returns:
+            Dict: {'code': 列名, 'name': 列名, 'value': 列名, 'rate': 列名}，未找到的字段为 None
+        """
+        if df is None or df.empty:
+            return dict.fromkeys(FieldHelper.COLUMN_PATTERNS)
+        return FieldHelper._resolve_columns(tuple(df.columns))
+    
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _resolve_columns(columns: tuple) -> Dict[str, Optional[str]]:
+        # 与 find_column 的优先级一致：模式顺序优先，同一模式下精确匹配优先，其次取最靠前的列
+        best = {}
+        for position, col in enumerate(columns):
+            if not isinstance(col, str):
+                continue
+            for field, patterns in FieldHelper.COLUMN_PATTERNS.items():
+                for rank, pattern in enumerate(patterns):
+                    if pattern in col:
+                        key = (rank, pattern != col, position)
+                        if field not in best or key < best[field][0]:
+                            best[field] = (key, col)
+                        break
+        return {field: best[field][1] if field in best else None for field in FieldHelper.COLUMN_PATTERNS}
+    
     @staticmethod
     def get_fund_code_column(df: pd.DataFrame) -> str:
         """获取基金代码列名"""
-        patterns = ['基金代码', 'fund_code', '代码']
-        return FieldHelper.find_column(df, patterns)
+        return FieldHelper.build_column_map(df)['code']
     
     @staticmethod
     def get_fund_name_column(df: pd.DataFrame) -> str:
         """获取基金名称列名"""
-        patterns = ['基金简称', '基金名称', 'fund_name', '简称', '名称']
-        return FieldHelper.find_column(df, patterns)
+        return FieldHelper.build_column_map(df)['name']
     
     @staticmethod
     def get_net_value_column(df: pd.DataFrame) -> str:
         """获取单位净值列名"""
-        patterns = ['单位净值', 'net_value', '净值']
-        return FieldHelper.find_column(df, patterns)
+        return FieldHelper.build_column_map(df)['value']
     
     @staticmethod
     def get_change_rate_column(df: pd.DataFrame) -> str:
         """获取涨跌率列名"""
-        patterns = ['日增长率', '增长率', '涨跌率', '涨幅', 'change_rate']
-        return FieldHelper.find_column(df, patterns)
+        return FieldHelper.build_column_map(df)['rate']
     
     @staticmethod
     def parse_percentage(value) -> float:
@@ -100,28 +192,128 @@ class FieldHelper:
         Returns:
             float: 数值形式的百分比
         """
-        if pd.isna(value):
-            return 0.0
+        return float(FieldHelper.parse_percentage_series(pd.Series([value], dtype=object))[0])
+    
+    @staticmethod
+    def parse_percentage_series(values: pd.Series) -> np.ndarray:
+        """
+        整列解析百分比值，去除%符号及空白后转换为数值
         
-        try:
-            # 转换为字符串并清理
-            str_value = str(value).strip()
-            
-            # 移除百分号
-            if '%' in str_value:
-                str_value = str_value.replace('%', '')
-            
-            # 转换为数值
-            return float(str_value)
+        Args:
+            values: 原始值序列（可能包含%符号）
             
-        except (ValueError, TypeError):
-            logger.warning(f"无法解析百分比值: {value}")
-            return 0.0
+        Returns:
+            np.ndarray: 数值形式的百分比，空值及无法解析的值记为 0.0
+        """
+        if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+            # 已是数值列（如历史数据计算出的涨跌率），无需字符串处理
+            return values.fillna(0.0).to_numpy(dtype=np.float64)
+        
+        if values.dtype == object and len(values) < FieldHelper.LISTCOMP_MAX_ROWS:
+            # 较小的 object 列用纯 Python 逐个转换，比 .str 访问器构建中间结果更快
+            parsed = np.fromiter(
+                (FieldHelper._parse_percentage_scalar(v) for v in values.to_numpy()),
+                dtype=np.float64, count=len(values)
+            )
+        else:
+            # 用 string dtype 做向量化的去%与去空白，空值保持为 <NA> 而不是 'nan' 字符串
+            parsed = pd.to_numeric(
+                values.astype('string').str.replace('%', '', regex=False).str.strip(),
+                errors='coerce'
+            ).to_numpy(dtype=np.float64, na_value=np.nan)
+        
+        invalid = np.isnan(parsed) & values.notna().to_numpy()
+        if invalid.any():
+            logger.warning(f"无法解析百分比值: {values[invalid].tolist()}")
+        return np.where(np.isnan(parsed), 0.0, parsed)
+    
+    @staticmethod
+    def _parse_percentage_scalar(value) -> float:
+        """解析单个百分比值，无法解析时返回 NaN"""
+        try:
+            if isinstance(value, str):
+                return float(value.replace('%', '').strip())
+            return float(value)
+        except (TypeError, ValueError):
+            return np.nan
+
+
+class RuleContext:
+    """一个规则检查批次共享的数据上下文，字段名对同一份数据只解析一次"""
+    
+    def __init__(self, data: pd.DataFrame):
+        self.data = data
+        columns = FieldHelper.build_column_map(data)
+        self.code_col = columns['code']
+        self.name_col = columns['name']
+        self.rate_col = columns['rate']
+        self.value_col = columns['value']
+        
+        # 数据中没有名称列时（如基金名称表获取失败）以基金代码代替，保证规则仍可执行
+        if self.name_col is None:
+            self.name_col = self.code_col
+        
+        # 热点列一次性转为 NumPy 数组（列式存储），规则直接按位置索引数组，不再逐格访问 DataFrame
+        self.codes = data[self.code_col].to_numpy() if self.code_col else None
+        self.names = data[self.name_col].to_numpy() if self.name_col else None
+        
+        # 需要解析的列在首次使用时才转换，批次中没有对应类型的规则时不做这部分工作
+        self._rates: Optional[np.ndarray] = None
+        self._values: Optional[np.ndarray] = None
+        self._code_index: Optional[Dict[Any, int]] = None
+        self._rate_order: Optional[np.ndarray] = None
+        self._sorted_rates: Optional[np.ndarray] = None
+    
+    @property
+    def rates(self) -> Optional[np.ndarray]:
+        """解析后的涨跌率数组，首次使用时解析"""
+        if self._rates is None and self.rate_col:
+            self._rates = FieldHelper.parse_percentage_series(self.data[self.rate_col])
+        return self._rates
+    
+    @property
+    def values(self) -> Optional[np.ndarray]:
+        """单位净值数组（无法解析的值为 NaN），首次使用时转换"""
+        if self._values is None and self.value_col:
+            self._values = pd.to_numeric(self.data[self.value_col], errors='coerce').to_numpy(dtype=np.float64)
+        return self._values
+    
+    @property
+    def code_index(self) -> Dict[Any, int]:
+        """{基金代码: 行位置} 索引，首次使用时构建；代码重复时取第一次出现的行"""
+        if self._code_index is None:
+            column = self.data[self.code_col] if self.code_col else None
+            if column is not None and isinstance(column.dtype, pd.CategoricalDtype):
+                # 分类列（fetcher 已将基金代码压缩为 category）直接在整数编码上求各代码首次出现的位置
+                uniques, first = np.unique(column.cat.codes.to_numpy(), return_index=True)
+                valid = uniques >= 0
+                self._code_index = dict(zip(column.cat.categories[uniques[valid]], first[valid].tolist()))
+            else:
+                codes = self.codes if self.codes is not None else np.array([])
+                # 逆序写入，重复代码最终保留最靠前的位置
+                self._code_index = dict(zip(codes[::-1], range(len(codes) - 1, -1, -1)))
+        return self._code_index
+    
+    @property
+    def rate_order(self) -> np.ndarray:
+        """按涨跌率升序排列的行位置，首次使用时排序，供多个全市场跌幅规则共享"""
+        if self._rate_order is None:
+            self._rate_order = np.argsort(self.rates, kind='stable')
+        return self._rate_order
+    
+    @property
+    def sorted_rates(self) -> np.ndarray:
+        """升序排列的涨跌率，与 rate_order 一一对应"""
+        if self._sorted_rates is None:
+            self._sorted_rates = self.rates[self.rate_order]
+        return self._sorted_rates
 
 
 class PercentageDropRule(Rule):
     """跌幅监控规则 - 优化版"""
     
+    REQUIRED_FIELDS = {'code_col': "基金代码", 'name_col': "基金名称", 'rate_col': "涨跌率"}
+    
     def __init__(self, name: str, threshold: float, fund_codes: List[str] = None):
         """
         Args:
@@ -132,65 +324,58 @@ class PercentageDropRule(Rule):
         super().__init__(name, f"监控基金跌幅超过{threshold}%")
         self.threshold = threshold
         self.fund_codes = fund_codes or []
+        # 警告消息模板在构造时生成，阈值部分只格式化一次
+        self._msg_tmpl = ("跌幅", "%.2f", f"%，超过阈值-{threshold}%")
     
-    def check(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def check(self, data: pd.DataFrame, ctx: Optional[RuleContext] = None) -> List[Dict[str, Any]]:
         alerts = []
         
         if data is None or data.empty:
             return alerts
         
-        # 动态获取字段名
-        code_col = FieldHelper.get_fund_code_column(data)
-        name_col = FieldHelper.get_fund_name_column(data)
-        rate_col = FieldHelper.get_change_rate_column(data)
-        
-        if not all([code_col, name_col, rate_col]):
-            missing = []
-            if not code_col: missing.append("基金代码")
-            if not name_col: missing.append("基金名称")
-            if not rate_col: missing.append("涨跌率")
-            logger.error(f"缺少必要字段: {missing}")
+        # 字段名与数组在批次内共享
+        ctx = self._resolve_context(data, ctx)
+        if ctx is None:
             return alerts
         
-        # 筛选要监控的基金
-        if self.fund_codes:
-            filtered_data = data[data[code_col].isin(self.fund_codes)]
-            if filtered_data.empty:
-                logger.warning(f"规则 {self.name}: 未找到指定的基金代码")
-                return alerts
-        else:
-            filtered_data = data
-        
-        # 检查跌幅超过阈值的基金
+        # 检查跌幅超过阈值的基金：在批次共享的涨跌率数组上定位触发的行，只为这些基金构建警告
         try:
-            triggered_count = 0
+            if self.fund_codes:
+                # 指定基金：通过代码索引得到行位置，只查找本规则的少量代码，不扫描整列
+                code_index = ctx.code_index
+                positions = np.array(
+                    sorted({code_index[code] for code in self.fund_codes if code in code_index}), dtype=np.intp
+                )
+                if positions.size == 0:
+                    logger.warning(f"规则 {self.name}: 未找到指定的基金代码")
+                    return alerts
+                hits = positions[ctx.rates[positions] <= -self.threshold]
+            else:
+                # 全部基金：批次内共享一次排序，各阈值二分查找触发边界，再恢复为数据中的行顺序
+                boundary = np.searchsorted(ctx.sorted_rates, -self.threshold, side='right')
+                hits = np.sort(ctx.rate_order[:boundary])
             
-            for _, fund in filtered_data.iterrows():
-                change_rate = FieldHelper.parse_percentage(fund[rate_col])
-                
-                # 检查是否超过跌幅阈值
-                if change_rate <= -self.threshold:
-                    alerts.append({
-                        'fund_code': fund[code_col],
-                        'fund_name': fund[name_col],
-                        'message': f"基金 {fund[name_col]}({fund[code_col]}) 跌幅{change_rate:.2f}%，超过阈值-{self.threshold}%",
-                        'value': change_rate,
-                        'rule_name': self.name
-                    })
-                    triggered_count += 1
+            alerts = self._emit_alerts(ctx.codes, ctx.names, ctx.rates, hits, self._msg_tmpl)
             
-            if triggered_count > 0:
-                logger.info(f"规则 {self.name}: 触发 {triggered_count} 个警告")
+            if alerts:
+                logger.info(f"规则 {self.name}: 触发 {len(alerts)} 个警告")
                     
         except Exception as e:
             logger.error(f"规则 {self.name} 执行时出错: {e}")
         
         return alerts
 
-
 class PriceThresholdRule(Rule):
     """净值阈值监控规则 - 优化版"""
     
+    REQUIRED_FIELDS = {'code_col': "基金代码", 'name_col': "基金名称", 'value_col': "单位净值"}
+    
+    # 操作符对应的比较函数，未知操作符不触发
+    COMPARATORS = {
+        "below": lambda value, threshold: value < threshold,
+        "above": lambda value, threshold: value > threshold,
+    }
+    
     def __init__(self, name: str, fund_code: str, threshold: float, operator: str = "below"):
         """
         Args:
@@ -204,53 +389,34 @@ class PriceThresholdRule(Rule):
         self.fund_code = fund_code
         self.threshold = threshold
         self.operator = operator
+        # 比较函数与警告消息模板按操作符预先确定，检查时不再分支判断
+        self._compare = self.COMPARATORS.get(operator)
+        self._msg_tmpl = ("净值", "%s", f"{op_text}阈值{threshold}")
     
-    def check(self, data: pd.DataFrame) -> List[Dict[str, Any]]:
+    def check(self, data: pd.DataFrame, ctx: Optional[RuleContext] = None) -> List[Dict[str, Any]]:
         alerts = []
         
         if data is None or data.empty:
             return alerts
         
-        # 动态获取字段名
-        code_col = FieldHelper.get_fund_code_column(data)
-        name_col = FieldHelper.get_fund_name_column(data)
-        value_col = FieldHelper.get_net_value_column(data)
-        
-        if not all([code_col, name_col, value_col]):
-            missing = []
-            if not code_col: missing.append("基金代码")  
-            if not name_col: missing.append("基金名称")
-            if not value_col: missing.append("单位净值")
-            logger.error(f"缺少必要字段: {missing}")
+        # 字段名与数组在批次内共享
+        ctx = self._resolve_context(data, ctx)
+        if ctx is None:
             return alerts
             
-        # 查找指定基金
-        fund_data = data[data[code_col] == self.fund_code]
+        # 通过代码索引直接定位指定基金，不逐行比较整列
+        position = ctx.code_index.get(self.fund_code)
         
-        if fund_data.empty:
+        if position is None:
             logger.warning(f"规则 {self.name}: 未找到基金代码 {self.fund_code}")
             return alerts
         
         try:
-            fund = fund_data.iloc[0]
-            current_value = float(fund[value_col])
-            
-            triggered = False
-            if self.operator == "below" and current_value < self.threshold:
-                triggered = True
-                op_text = "低于"
-            elif self.operator == "above" and current_value > self.threshold:
-                triggered = True
-                op_text = "高于"
+            if np.isnan(ctx.values[position]):
+                raise ValueError(f"无法解析净值: {data[ctx.value_col].iat[position]!r}")
             
-            if triggered:
-                alerts.append({
-                    'fund_code': fund[code_col],
-                    'fund_name': fund[name_col],
-                    'message': f"基金 {fund[name_col]}({fund[code_col]}) 净值{current_value}{op_text}阈值{self.threshold}",
-                    'value': current_value,
-                    'rule_name': self.name
-                })
+            if self._compare is not None and self._compare(ctx.values[position], self.threshold):
+                alerts = self._emit_alerts(ctx.codes, ctx.names, ctx.values, [position], self._msg_tmpl)
                 logger.info(f"规则 {self.name}: 触发净值警告")
                 
         except Exception as e:
@@ -258,7 +424,6 @@ class PriceThresholdRule(Rule):
         
         return alerts
 
-
 class RuleEngine:
     """规则引擎，管理和执行所有监控规则"""
     
@@ -293,14 +458,21 @@ class RuleEngine:
             logger.warning("规则引擎: 输入数据为空")
             return []
         
+        if not self.rules:
+            logger.info("规则引擎: 未配置任何规则")
+            return []
+        
         all_alerts = []
         successful_rules = 0
         
         logger.info(f"开始执行 {len(self.rules)} 个规则检查...")
         
+        # 字段名对整批规则只解析一次；涨跌率、净值、代码索引在首个需要的规则中按需构建，之后整批复用
+        ctx = RuleContext(data)
+        
         for rule in self.rules:
             try:
-                alerts = rule.check(data)
+                alerts = rule.check(data, ctx)
                 all_alerts.extend(alerts)
                 successful_rules += 1
                 logger.debug(f"规则 {rule.name}: 触发 {len(alerts)} 个警告")
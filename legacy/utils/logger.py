@@ -6,9 +6,12 @@ Author: TickEye Team
 Date: 2025-01-24
 """
 
+import atexit
 import logging
+import queue
 import sys
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener
 import os
 
 def setup_logger(name: str, level: int = logging.INFO, 
@@ -56,7 +59,16 @@ def setup_logger(name: str, level: int = logging.INFO,
         file_handler = logging.FileHandler(log_file, encoding='utf-8')
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        
+        # 文件写入交给后台线程，调用方（如并发获取数据的线程）只需入队，不阻塞在磁盘 IO 上
+        log_queue = queue.SimpleQueue()
+        queue_handler = QueueHandler(log_queue)
+        queue_handler.setLevel(level)
+        logger.addHandler(queue_handler)
+        
+        listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)  # 退出前写完队列中剩余的日志
     
     return logger
 
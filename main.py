@@ -8,18 +8,15 @@ Date: 2025-08-06
 """
 
 import sys
-import os
 from datetime import datetime
 import logging
+import pandas as pd
 from dotenv import load_dotenv
 
 # 加载环境变量
 load_dotenv()
 
-# 添加项目路径
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
-from fund_analysis import get_fund_summary, get_owned_funds
+from fund_analysis import fetch_fund_summaries, get_owned_funds
 from feishu_notifier import FeishuNotifier
 from feishu_config import get_config
 
@@ -41,36 +38,29 @@ def convert_fund_data_for_feishu(fund_summaries):
     Returns:
         dict: 适合飞书通知的数据格式
     """
-    feishu_data = {}
-    
-    for summary in fund_summaries:
-        # 只处理状态正常的基金
-        if summary['status'] == '正常':
-            fund_code = summary['fund_code']
-            
-            # 提取净值（去掉字符串格式）
-            try:
-                price = float(summary['net_value'])
-            except (ValueError, TypeError):
-                price = 0.0
-            
-            # 提取涨跌幅（去掉%符号）
-            try:
-                change_str = summary['change_pct']
-                if change_str != 'N/A' and '%' in change_str:
-                    change = float(change_str.replace('%', ''))
-                else:
-                    change = 0.0
-            except (ValueError, TypeError):
-                change = 0.0
-            
-            feishu_data[fund_code] = {
-                "name": summary['fund_name'],
-                "price": price,
-                "change": change
-            }
-    
-    return feishu_data
+    df = pd.DataFrame(fund_summaries)
+    if df.empty or 'status' not in df.columns:
+        return {}
+    
+    # 只处理状态正常的基金
+    df = df[df['status'] == '正常']
+    
+    # 提取净值（无法解析时记为 0）
+    prices = pd.to_numeric(df['net_value'], errors='coerce').fillna(0.0)
+    
+    # 提取涨跌幅（去掉%符号，N/A 等不含%的值记为 0）
+    change_str = df['change_pct'].astype(str)
+    changes = pd.to_numeric(
+        change_str.str.replace('%', '', regex=False).where(change_str.str.contains('%', regex=False)),
+        errors='coerce',
+    ).fillna(0.0)
+    
+    return {
+        fund_code: {"name": fund_name, "price": float(price), "change": float(change)}
+        for fund_code, fund_name, price, change in zip(
+            df['fund_code'], df['fund_name'], prices.to_numpy(), changes.to_numpy()
+        )
+    }
 
 
 def get_all_fund_summaries(days=1):
@@ -88,15 +78,10 @@ def get_all_fund_summaries(days=1):
         logger.error("未配置任何基金代码！")
         return []
     
-    logger.info(f"开始获取 {len(owned_funds)} 个标的的数据...")
-    
-    fund_summaries = []
-    for fund_code in owned_funds:
-        logger.info(f"正在获取基金 {fund_code} 的数据...")
-        summary = get_fund_summary(fund_code, days)
-        fund_summaries.append(summary)
+    logger.info("开始获取 %d 个标的的数据...", len(owned_funds))
     
-    return fund_summaries
+    # 线程池并发获取，结果顺序与配置一致；单个标的失败时 get_fund_summary 返回错误状态
+    return fetch_fund_summaries(owned_funds, days)
 
 
 def send_fund_analysis_to_feishu(days=1, send_summary=True, send_table=False):
@@ -164,23 +149,26 @@ def send_fund_analysis_to_feishu(days=1, send_summary=True, send_table=False):
     success_notifications = 0
     total_notifications = 0
     
-    if send_summary:
-        total_notifications += 1
-        print("  发送市场概览卡片...")
-        if notifier.send_market_summary(feishu_data):
-            print("  ✅ 市场概览卡片发送成功")
-            success_notifications += 1
-        else:
-            print("  ❌ 市场概览卡片发送失败")
-    
-    if send_table:
-        total_notifications += 1
-        print("  发送市场概览表格...")
-        if notifier.send_market_summary_table(feishu_data):
-            print("  ✅ 市场概览表格发送成功")
-            success_notifications += 1
-        else:
-            print("  ❌ 市场概览表格发送失败")
+    try:
+        if send_summary:
+            total_notifications += 1
+            print("  发送市场概览卡片...")
+            if notifier.send_market_summary(feishu_data):
+                print("  ✅ 市场概览卡片发送成功")
+                success_notifications += 1
+            else:
+                print("  ❌ 市场概览卡片发送失败")
+        
+        if send_table:
+            total_notifications += 1
+            print("  发送市场概览表格...")
+            if notifier.send_market_summary_table(feishu_data):
+                print("  ✅ 市场概览表格发送成功")
+                success_notifications += 1
+            else:
+                print("  ❌ 市场概览表格发送失败")
+    finally:
+        notifier.close()
     
     # 输出结果
     print("\n" + "=" * 60)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基金净值公布时刻
+fund_analysis.py 与 legacy/monitor/fetcher.py 的净值缓存共用同一失效时刻
+"""
+
+from datetime import datetime, timedelta, timezone
+
+CST = timezone(timedelta(hours=8))  # 北京时间
+NAV_UPDATE_TIME = (21, 0)  # 基金净值通常在交易日晚间公布，此前获取的净值在该时刻后失效
+
+
+def last_nav_update() -> float:
+    """最近一次净值公布时刻（北京时间，仅交易日）的时间戳，早于该时刻获取的净值视为过期"""
+    now = datetime.now(CST)
+    hour, minute = NAV_UPDATE_TIME
+    boundary = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if now < boundary:
+        boundary -= timedelta(days=1)
+    while boundary.weekday() >= 5:  # 周末没有新净值
+        boundary -= timedelta(days=1)
+    return boundary.timestamp()